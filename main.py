@@ -1,74 +1,109 @@
 import os
 import sounddevice as sd
-from scipy.io.wavfile import write
+import soundfile as sf
 import numpy as np
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
-# import simpleaudio as sa
 
 # ---------------------------
 # Configuration
 # ---------------------------
 SAMPLE_RATE = 16000  # 16kHz sampling rate
 CHANNELS = 1         # Mono recording
+METER_INTERVAL = 0.1 # Seconds between level meter refreshes (~10 Hz)
+METER_WINDOW = int(SAMPLE_RATE * METER_INTERVAL)  # Samples averaged per meter refresh
 os.makedirs("data", exist_ok=True)  # Ensure data folder exists
 
 # ---------------------------
-# Global Variables
+# Recorder State
 # ---------------------------
-audio_segments = []   # Stores recorded audio segments
+@dataclass
+class RecorderState:
+    """Holds the capture buffer and how many samples have been written to it."""
+    buf: np.ndarray = field(default_factory=lambda: np.empty((0, CHANNELS), dtype=np.float32))
+    pos: int = 0
+
+    @property
+    def audio(self):
+        """The recorded samples as a view over the capture buffer."""
+        return self.buf[:self.pos]
 
 # ---------------------------
 # Recording Function
 # ---------------------------
-def record_audio(duration):
-    """Records audio and stores it in audio_segments."""
-    global audio_segments
-
+def record_audio(state, duration):
+    """Records audio into state and returns the captured samples."""
     print("\n🔴 Recording... (Ctrl+C to stop early)")
+    total_samples = int(duration * SAMPLE_RATE)
+    state.buf = np.empty((total_samples, CHANNELS), dtype=np.float32)
+    state.pos = 0
+    scratch = np.empty((METER_WINDOW, CHANNELS), dtype=np.float32)
+    finished = threading.Event()
+
+    def callback(indata, frames, time_info, status):
+        """Copy each captured block straight into the preallocated buffer."""
+        n = min(frames, total_samples - state.pos)
+        state.buf[state.pos:state.pos + n] = indata[:n]
+        state.pos += n
+        if state.pos >= total_samples:
+            raise sd.CallbackStop
+
     try:
-        audio = []
-        with sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS) as stream:
-            for _ in range(int(duration * SAMPLE_RATE / 512)):
-                data, _ = stream.read(512)
-                audio.append(data)
-                # Real-time waveform display
-                print("▌" * int(np.mean(np.abs(data)) * 50), end="\r")
-        
-        audio_segments = np.concatenate(audio)
+        with sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype="float32",
+                            blocksize=0, callback=callback, finished_callback=finished.set):
+            # Real-time waveform display
+            while not finished.wait(METER_INTERVAL):
+                end = state.pos
+                start = max(0, end - METER_WINDOW)
+                if end > start:
+                    level = float(np.abs(state.buf[start:end], out=scratch[:end - start]).mean())
+                    print("▌" * int(level * 50), end="\r")
+
         print("\n⏹️ Recording completed!")
     except KeyboardInterrupt:
         print("\n⏹️ Recording stopped by user.")
-        audio_segments = np.concatenate(audio)
+    return state.audio
 
-def save_recording():
+def save_recording(state):
     """Save the recorded audio to a file."""
-    global audio_segments
-
-    if len(audio_segments) == 0:
+    audio = state.audio
+    if len(audio) == 0:
         print("⚠️ No recording available to save.")
         return None
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_path = f"data/recording_{timestamp}.wav"
-    write(file_path, SAMPLE_RATE, audio_segments)
+    # Clip, scale and round in one float32 scratch buffer before the int16 cast
+    scratch = np.clip(audio, -1.0, 1.0)
+    np.multiply(scratch, 32767.0, out=scratch)
+    np.rint(scratch, out=scratch)
+    int_audio = scratch.astype(np.int16)
+    sf.write(file_path, int_audio, SAMPLE_RATE, subtype="PCM_16")
     
     print(f"\n✅ Recording saved as {file_path}")
     return file_path
 
-# def play_audio(file_path):
-#     """Play the saved audio file using simpleaudio."""
-#     try:
-#         if not os.path.exists(file_path):
-#             print(f"⚠️ File not found: {file_path}")
-#             return
-        
-#         print("\n🔊 Playing recorded audio...")
-#         wave_obj = sa.WaveObject.from_wave_file(file_path)
-#         play_obj = wave_obj.play()
-#         play_obj.wait_done()  # Wait until playback finishes
-#         print("🎵 Playback finished.")
-#     except Exception as e:
-#         print(f"⚠️ Error playing audio: {e}")
+def play_audio(state, file_path=None):
+    """Play a saved recording, or the latest recording still in memory."""
+    try:
+        if file_path:
+            if not os.path.exists(file_path):
+                print(f"⚠️ File not found: {file_path}")
+                return
+            audio, sample_rate = sf.read(file_path, dtype="float32")
+        else:
+            audio, sample_rate = state.audio, SAMPLE_RATE
+            if len(audio) == 0:
+                print("⚠️ No recording available to play.")
+                return
+
+        print("\n🔊 Playing recorded audio...")
+        sd.play(np.ascontiguousarray(audio, dtype=np.float32), sample_rate)
+        sd.wait()  # Wait until playback finishes
+        print("🎵 Playback finished.")
+    except Exception as e:
+        print(f"⚠️ Error playing audio: {e}")
 
 # ---------------------------
 # Main Program Interface
@@ -76,22 +111,21 @@ def save_recording():
 def main():
     print("\n🎙️ Python Voice Recorder with Playback")
     print("-------------------------------------")
-    
+    state = RecorderState()
+
     while True:
         command = input("\nEnter command: [record/save/play/exit]: ").lower()
 
         if command == "record":
             duration = int(input("Enter recording time in seconds: "))
-            record_audio(duration)
+            record_audio(state, duration)
         elif command == "save":
-            file_path = save_recording()
+            file_path = save_recording(state)
             if file_path:
                 print(f"Saved recording at {file_path}")
         elif command == "play":
             file_path = input("Enter the path of the saved recording (or press Enter to use the latest): ")
-            if not file_path.strip():
-                file_path = f"data/recording_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
-            play_audio(file_path)
+            play_audio(state, file_path.strip() or None)
         elif command == "exit":
             print("Exiting program. Goodbye!")
             break